@@ -3,18 +3,261 @@ from odoo import api, fields, models, tools, SUPERUSER_ID, _
 from odoo.exceptions import UserError, AccessError
 from odoo.tools.misc import find_in_path, ustr
 from odoo.http import request
+import functools
 import logging 
 import os
+import re
 import tempfile
 import subprocess
-from contextlib import closing
 _logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(1)
 def _get_wkhtmltopdf_bin():
     return find_in_path('wkhtmltopdf')
 
 
+# Characters around a Myanmar run that the reshaping rules may still read, move or replace
+_MYANMAR_TEXT_CONTEXT = 8
+# Runs of Myanmar characters and the Pyidaungsu glyphs they are reshaped into,
+# joined together when their contexts would overlap
+_MYANMAR_TEXT_RE = re.compile(
+    '[\u1000-\u109F\uE000-\uE5FF]+(?:[^\u1000-\u109F\uE000-\uE5FF]{1,%d}[\u1000-\u109F\uE000-\uE5FF]+)*'
+    % (2 * _MYANMAR_TEXT_CONTEXT))
+# Empty cells put on both sides of the text, so the rules reading up to 3 cells
+# before or after it neither wrap around to the other end nor run off the list
+_MYANMAR_TEXT_PADDING = [''] * 4
+# Longest run whose reshaped form is cached
+_MYANMAR_TEXT_CACHED_RUN_LENGTH = 1024
+# Consonants and glyphs after which the 'U' and 'UU' vowels take their long form
+_MYANMAR_TEXT_SPECIAL_CHARACTERS = frozenset({
+    '\u1008', '\u1009', '\u100A', '\u100B', '\u100C', '\u100D', '\u1020', '\u1023',
+    '\u1025', '\u1026', '\uE009', '\uE100', '\uE101', '\uE10A', '\uE103', '\uE105',
+})
+# Consonants written after a virama and the stacked glyphs replacing both,
+# other than the ones needing more context ('\u100D' and '\u1019')
+_MYANMAR_TEXT_VIRAMA_GLYPHS = {
+    '\u1000': '\uE000', '\u1001': '\uE001', '\u1002': '\uE002', '\u1003': '\uE003',
+    '\u1005': '\uE005', '\u1006': '\uE006', '\u1007': '\uE007', '\u1008': '\uE008',
+    '\u100A': '\uE00A', '\u100B': '\uE00B', '\u100C': '\uE00C', '\u100E': '\uE00E',
+    '\u100F': '\uE00F', '\u1010': '\uE010', '\u1011': '\uE011', '\u1012': '\uE012',
+    '\u1013': '\uE013', '\u1014': '\uE014', '\u1015': '\uE015', '\u1016': '\uE016',
+    '\u1017': '\uE017', '\u1018': '\uE018', '\u101C': '\uE01C', '\u101E': '\uE01E',
+    '\u101F': '\uE553', '\u1021': '\uE021',
+}
+
+
+def _myanmar_text_positions(html_list, character):
+    """Yield the indexes of the cells holding the given character.
+
+    The next index is searched with list.index() only once the caller is done
+    with the previous one, so the cells it changed are taken into account.
+    """
+    i = -1
+    while True:
+        try:
+            i = html_list.index(character, i + 1)
+        except ValueError:
+            return
+        yield i
+
+
+def _myanmar_text_reshape_run(html):
+    """Apply the reshaping rules to a Myanmar run and the context around it."""
+    html_list = _MYANMAR_TEXT_PADDING + list(html) + _MYANMAR_TEXT_PADDING
+
+    # Step - 1: Reorder the characters
+    ###########
+    # Reorder the 'ThaWaiHtoo' character
+    for i in _myanmar_text_positions(html_list, '\u1031'):
+        if html_list[i - 1] == '\u101B':
+            html_list[i - 1], html_list[i] = '\u001D\u1031', '\u101B'
+        # Move it in front of all the medials written before it, in one slice
+        j = i - 1
+        while html_list[j] in {'\u103B', '\u103C', '\u103D', '\u103E'}:
+            j -= 1
+        if j < i - 1:
+            html_list[j + 1:i + 1] = [html_list[i]] + html_list[j + 1:i]
+
+    # Reorder the 'YaYit' character
+    for i in _myanmar_text_positions(html_list, '\u103C'):
+        if html_list[i - 1] == '\u1031':
+            html_list[i - 2], html_list[i - 1], html_list[i] = '\u001D\u1031', html_list[i], html_list[i - 2]
+        else:
+            html_list[i - 1], html_list[i] = html_list[i], html_list[i - 1]
+
+    # Step 2: Substitute the characters
+    #########
+    # 'YaYit' character substitutions
+    for i in _myanmar_text_positions(html_list, '\u103C'):
+        if html_list[i + 1] in {'\u1000', '\u1003', '\u100F', '\u1006', '\u1010', '\u1011',
+                                '\u1018', '\u101A', '\u101C', '\u101E', '\u101F', '\u1021'}:
+            html_list[i] = '\uE1B2'
+
+    # One-to-One character substitutions
+    for i, v in enumerate(html_list):
+        if v not in {'\u1009', '\u1014', '\u101B', '\u102F', '\u1030', '\u1037', '\u103E'}:
+            continue
+        if v == '\u1014':
+            if html_list[i + 1] in {'\u102F', '\u1030', '\u103D', '\u103E'}:
+                html_list[i] = '\uE107'
+            if html_list[i + 2] in {'\u102F', '\u1030'}:
+                html_list[i] = '\uE107'
+            if html_list[i + 1] == '\u1031':
+                if html_list[i + 2] in {'\u102F', '\u1030', '\u103D', '\u103E'}:
+                    html_list[i], html_list[i + 1], html_list[i + 2] = '\u001D\u1031', '\uE107', html_list[i + 2]
+        if v == '\u101B':
+            if (html_list[i + 1] in {'\u102F', '\u1030'} or html_list[i + 2] in {'\u102F', '\u1030'}
+                    or html_list[i + 3] in {'\u102F', '\u1030'}):
+                html_list[i] = '\uE108'
+        if v == '\u102F':
+            if (html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B'
+                    or html_list[i - 2] in {'\u103C', '\uE1B2'} or html_list[i - 3] in {'\u103C', '\uE1B2'}
+                    or html_list[i - 1] in _MYANMAR_TEXT_SPECIAL_CHARACTERS
+                    or html_list[i - 2] in _MYANMAR_TEXT_SPECIAL_CHARACTERS):
+                html_list[i] = '\uE2F1'
+        if v == '\u1030':
+            if (html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B'
+                    or html_list[i - 2] in {'\u103C', '\uE1B2'} or html_list[i - 3] in {'\u103C', '\uE1B2'}
+                    or html_list[i - 1] in _MYANMAR_TEXT_SPECIAL_CHARACTERS
+                    or html_list[i - 2] in _MYANMAR_TEXT_SPECIAL_CHARACTERS):
+                html_list[i] = '\uE2F2'
+        if v == '\u1037':
+            # The later rules take precedence over the earlier ones
+            if html_list[i - 1] == '\u103E' or html_list[i - 2] == '\u103E':
+                if html_list[i - 3] == '\u101B':
+                    html_list[i] = '\uE137'
+                else:
+                    html_list[i] = '\uE037'
+            elif (html_list[i - 1] in {'\uE2F1', '\uE2F2', '\u103D'}
+                    or html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B'):
+                html_list[i] = '\uE137'
+            elif (html_list[i - 1] in {'\u102F', '\u1030'}
+                    or html_list[i - 1] == '\u1014' or html_list[i - 2] == '\u1014'):
+                html_list[i] = '\uE037'
+        if v == '\u103E':
+            if html_list[i - 2] in {'\u103C', '\uE1B2'}:
+                html_list[i] = '\uE1F3'
+        if v == '\u1009':
+            html_list[i] = '\uE009'
+
+    # Two-to-One character substitutions
+    for i, v in enumerate(html_list):
+        if v not in {'\u102B', '\u102D', '\u102F', '\u1030', '\u103B', '\u103D'}:
+            continue
+        if v == '\u102D':
+            if html_list[i + 1] == '\u1036':
+                html_list[i], html_list[i + 1] = '\uE2D1', ''
+            if html_list[i + 1] == '\u1032':
+                html_list[i], html_list[i + 1] = '\uE12D', ''
+        if v == '\u102B':
+            if html_list[i + 1] == '\u103A':
+                html_list[i], html_list[i + 1] = '\uE02D', ''
+            if html_list[i + 1] == '\u1032':
+                html_list[i], html_list[i + 1] = '\uE52C', ''
+            if html_list[i + 1] == '\u1036':
+                html_list[i], html_list[i + 1] = '\uE52B', ''
+        if v == '\u103B':
+            if html_list[i + 1] == '\u103D':
+                html_list[i], html_list[i + 1] = '\uE1A4', ''
+                if html_list[i + 2] == '\u103E':
+                    html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1D1', '\u103B', ''
+            if html_list[i + 1] == '\u103E':
+                html_list[i], html_list[i + 1] = '\uE1A3', ''
+        if v == '\u103D':
+            if html_list[i + 1] == '\u103E':
+                html_list[i], html_list[i + 1] = '\uE1D1', ''
+        if v == '\u102F':
+            if html_list[i - 1] == '\u103E':
+                html_list[i - 1], html_list[i] = '\uE1F2', ''
+            if html_list[i - 2] == '\u103E':
+                html_list[i - 2], html_list[i] = '\uE1F2', ''
+        if v == '\u1030':
+            if html_list[i - 1] == '\u103E':
+                html_list[i - 1], html_list[i] = '\uE430', ''
+            if html_list[i - 2] == '\u103E':
+                html_list[i - 2], html_list[i] = '\uE430', ''
+
+    # Virama character substitutions
+    for i in _myanmar_text_positions(html_list, '\u1039'):
+        if html_list[i - 1] == '\u103A' and html_list[i - 2] == '\u1004':
+            html_list[i - 2], html_list[i - 1], html_list[i] = '', '', '\uE390'
+            if html_list[i + 1] == '\u103C':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1B6', html_list[i + 2], html_list[i]
+            elif html_list[i + 1] == '\uE1B2':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1B7', html_list[i + 2], html_list[i]
+            else:
+                html_list[i], html_list[i + 1] = html_list[i + 1], html_list[i]
+        else:
+            if html_list[i + 1] in _MYANMAR_TEXT_VIRAMA_GLYPHS:
+                html_list[i], html_list[i + 1] = _MYANMAR_TEXT_VIRAMA_GLYPHS[html_list[i + 1]], ''
+
+            if html_list[i - 1] == '\u100F' and html_list[i + 1] == '\u100D':
+                html_list[i - 1], html_list[i], html_list[i + 1] = '\uE105', '', ''
+            elif html_list[i + 1] == '\u100D':
+                html_list[i], html_list[i + 1] = '\uE00D', ''
+
+            if html_list[i + 1] == '\u1019':
+                if html_list[i + 2] == '\u1031':
+                    html_list[i], html_list[i + 1], html_list[i + 2] = '\u1031', '\uE019', ''
+                else:
+                    html_list[i], html_list[i + 1] = '\uE019', ''
+
+            if html_list[i - 1] not in {'\u1000', '\u1003', '\u1006', '\u100F', '\u1010', '\u1011',
+                                        '\u1018', '\u101A', '\u101C', '\u101E', '\u101F', '\u1021'}:
+                if html_list[i] == '\uE010': html_list[i] = '\uE01F'
+                if html_list[i] == '\uE011': html_list[i] = '\uE020'
+
+            if html_list[i + 2] == '\u102F': html_list[i + 2] = '\uE2F1'
+            if html_list[i + 2] == '\u1030': html_list[i + 2] = '\uE2F2'
+            if html_list[i - 1] == '\u1014': html_list[i - 1] = '\uE107'
+
+    # 'KinZi' variant substitutions
+    for i in _myanmar_text_positions(html_list, '\uE390'):
+        if html_list[i + 1] == '\u103B':
+            if html_list[i + 2] == '\u102E':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE392', html_list[i + 1], ''
+            if html_list[i + 2] == '\u102D':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE391', html_list[i + 1], ''
+            if html_list[i + 2] == '\u1032':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE396', html_list[i + 1], ''
+            if html_list[i + 2] == '\u1036':
+                html_list[i], html_list[i + 1], html_list[i + 2] = '\uE393', html_list[i + 1], ''
+        else:
+            if html_list[i + 1] == '\u102E':
+                html_list[i], html_list[i + 1] = '\uE392', ''
+            if html_list[i + 1] == '\u102D':
+                html_list[i], html_list[i + 1] = '\uE391', ''
+            if html_list[i + 1] == '\u1032':
+                html_list[i], html_list[i + 1] = '\uE396', ''
+            if html_list[i + 1] == '\u1036':
+                html_list[i], html_list[i + 1] = '\uE393', ''
+
+    # 'YaYit' variant substitutions
+    for i in _myanmar_text_positions(html_list, '\u103C'):
+        if html_list[i + 2] in {'\u102D', '\u102E', '\u1032'}:
+            html_list[i] = '\uE1B6'
+        if html_list[i + 2] == '\u103D':
+            html_list[i] = '\uE1BB'
+            if html_list[i + 3] in {'\u102D', '\u102E', '\u1032'}:
+                html_list[i] = '\uE1B6'
+    for i in _myanmar_text_positions(html_list, '\uE1B2'):
+        if html_list[i + 2] in {'\u102D', '\u102E', '\u1032'}:
+            html_list[i] = '\uE1B7'
+        if html_list[i + 2] == '\u103D':
+            html_list[i] = '\uE1BC'
+            if html_list[i + 3] in {'\u102D', '\u102E', '\u1032'}:
+                html_list[i] = '\uE1B7'
+
+    # Every cell already holds a str, empty ones included
+    return ''.join(html_list)
+
+
+# Short runs (words, labels, header and footer lines) come back across the
+# reports of a batch, so their reshaped form is kept
+_myanmar_text_reshape_cached_run = functools.lru_cache(maxsize=2048)(_myanmar_text_reshape_run)
+
+
 class IrActionsReport(models.Model):
     _inherit = 'ir.actions.report'
 
@@ -58,312 +301,111 @@ class IrActionsReport(models.Model):
             specific_paperformat_args=specific_paperformat_args,
             set_viewport_size=set_viewport_size)
 
-        files_command_args = []
-        temporary_files = []
+        with tempfile.TemporaryDirectory(prefix='report.') as temporary_directory:
+            files_command_args = []
 
-        # Passing the cookie to wkhtmltopdf in order to resolve internal links.
-        session_sid = None
-        try:
-            if request:
-                session_sid = request.session.sid
-        except AttributeError:
-            pass
-        else:
-            base_url = self._get_report_url()
-            domain = urlparse(base_url).hostname
-            cookie = f'session_id={session_sid}; HttpOnly; domain={domain}; path=/;'
-            cookie_jar_file_fd, cookie_jar_file_path = tempfile.mkstemp(suffix='.txt', prefix='report.cookie_jar.tmp.')
-            temporary_files.append(cookie_jar_file_path)
-            with closing(os.fdopen(cookie_jar_file_fd, 'wb')) as cookie_jar_file:
-                cookie_jar_file.write(cookie.encode())
-            command_args.extend(['--cookie-jar', cookie_jar_file_path])
-
-        if header:
-            head_file_fd, head_file_path = tempfile.mkstemp(suffix='.html', prefix='report.header.tmp.')
-            with closing(os.fdopen(head_file_fd, 'wb')) as head_file:
-                # Reshape the Myanmar text for PDF report
-                header = self._myanmar_text_reshaper(header)
-                head_file.write(header.encode())
-            temporary_files.append(head_file_path)
-            files_command_args.extend(['--header-html', head_file_path])
-        if footer:
-            foot_file_fd, foot_file_path = tempfile.mkstemp(suffix='.html', prefix='report.footer.tmp.')
-            with closing(os.fdopen(foot_file_fd, 'wb')) as foot_file:
-                # Reshape the Myanmar text for PDF report
-                footer = self._myanmar_text_reshaper(footer)
-                foot_file.write(footer.encode())
-            temporary_files.append(foot_file_path)
-            files_command_args.extend(['--footer-html', foot_file_path])
-
-        paths = []
-        for i, body in enumerate(bodies):
-            prefix = '%s%d.' % ('report.body.tmp.', i)
-            body_file_fd, body_file_path = tempfile.mkstemp(suffix='.html', prefix=prefix)
-            with closing(os.fdopen(body_file_fd, 'wb')) as body_file:
-                # Reshape the Myanmar text for PDF report
-                body = self._myanmar_text_reshaper(body)
-                body_file.write(body.encode())
-            paths.append(body_file_path)
-            temporary_files.append(body_file_path)
-
-        pdf_report_fd, pdf_report_path = tempfile.mkstemp(suffix='.pdf', prefix='report.tmp.')
-        os.close(pdf_report_fd)
-        temporary_files.append(pdf_report_path)
-
-        try:
-            wkhtmltopdf = [_get_wkhtmltopdf_bin()] + command_args + files_command_args + paths + [pdf_report_path]
-            process = subprocess.Popen(wkhtmltopdf, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            out, err = process.communicate()
-            err = ustr(err)
-
-            if process.returncode not in [0, 1]:
-                if process.returncode == -11:
-                    message = _(
-                        'Wkhtmltopdf failed (error code: %s). Memory limit too low or maximum file number of subprocess reached. Message : %s')
-                else:
-                    message = _('Wkhtmltopdf failed (error code: %s). Message: %s')
-                _logger.warning(message, process.returncode, err[-1000:])
-                raise UserError(message % (str(process.returncode), err[-1000:]))
+            # Passing the cookie to wkhtmltopdf in order to resolve internal links.
+            session_sid = None
+            try:
+                if request:
+                    session_sid = request.session.sid
+            except AttributeError:
+                pass
             else:
-                if err:
-                    _logger.warning('wkhtmltopdf: %s' % err)
-        except:
-            raise
+                base_url = self._get_report_url()
+                domain = urlparse(base_url).hostname
+                cookie = f'session_id={session_sid}; HttpOnly; domain={domain}; path=/;'
+                cookie_jar_file_path = os.path.join(temporary_directory, 'cookie_jar.txt')
+                with open(cookie_jar_file_path, 'wb') as cookie_jar_file:
+                    cookie_jar_file.write(cookie.encode())
+                command_args.extend(['--cookie-jar', cookie_jar_file_path])
+
+            if header:
+                head_file_path = os.path.join(temporary_directory, 'header.html')
+                with open(head_file_path, 'wb') as head_file:
+                    # Reshape the Myanmar text for PDF report
+                    header = self._myanmar_text_reshaper(header)
+                    head_file.write(header.encode())
+                files_command_args.extend(['--header-html', head_file_path])
+            if footer:
+                foot_file_path = os.path.join(temporary_directory, 'footer.html')
+                with open(foot_file_path, 'wb') as foot_file:
+                    # Reshape the Myanmar text for PDF report
+                    footer = self._myanmar_text_reshaper(footer)
+                    foot_file.write(footer.encode())
+                files_command_args.extend(['--footer-html', foot_file_path])
+
+            paths = []
+            body_input = None
+            if len(bodies) == 1 and not header and not footer:
+                # A lone body is streamed to wkhtmltopdf through its standard input
+                # instead of a temporary file. It is reshaped once wkhtmltopdf is
+                # started, while the latter is still loading.
+                body_input = bodies[0]
+                paths.append('-')
+            else:
+                for i, body in enumerate(bodies):
+                    body_file_path = os.path.join(temporary_directory, 'body.%d.html' % i)
+                    with open(body_file_path, 'wb') as body_file:
+                        # Reshape the Myanmar text for PDF report
+                        body = self._myanmar_text_reshaper(body)
+                        body_file.write(body.encode())
+                    paths.append(body_file_path)
 
-        with open(pdf_report_path, 'rb') as pdf_document:
-            pdf_content = pdf_document.read()
+            pdf_report_path = os.path.join(temporary_directory, 'report.pdf')
 
-        # Manual cleanup of the temporary files
-        for temporary_file in temporary_files:
             try:
-                os.unlink(temporary_file)
-            except (OSError, IOError):
-                _logger.error('Error when trying to remove file %s' % temporary_file)
+                wkhtmltopdf = [_get_wkhtmltopdf_bin()] + command_args + files_command_args + paths + [pdf_report_path]
+                process = subprocess.Popen(wkhtmltopdf, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                if body_input is not None:
+                    try:
+                        # Reshape the Myanmar text for PDF report
+                        body_input = self._myanmar_text_reshaper(body_input).encode()
+                    except Exception:
+                        process.kill()
+                        process.communicate()
+                        raise
+                out, err = process.communicate(body_input)
+                err = ustr(err)
+
+                if process.returncode not in [0, 1]:
+                    if process.returncode == -11:
+                        message = _(
+                            'Wkhtmltopdf failed (error code: %s). Memory limit too low or maximum file number of subprocess reached. Message : %s')
+                    else:
+                        message = _('Wkhtmltopdf failed (error code: %s). Message: %s')
+                    _logger.warning(message, process.returncode, err[-1000:])
+                    raise UserError(message % (str(process.returncode), err[-1000:]))
+                else:
+                    if err:
+                        _logger.warning('wkhtmltopdf: %s' % err)
+            except:
+                raise
+
+            with open(pdf_report_path, 'rb') as pdf_document:
+                pdf_content = pdf_document.read()
 
         return pdf_content
 
     # Reshape the Myanmar text for PDF reports
     def _myanmar_text_reshaper(self, html):
-        html_list = list(html)
-
-        # Step - 1: Reorder the characters
-        ###########
-        # Reorder the 'ThaWaiHtoo' character
-        for i, v in enumerate(html_list):
-            if v == '\u1031':
-                if html_list[i - 1] == '\u101B':
-                    html_list[i - 1], html_list[i] = '\u001D\u1031', '\u101B'
-                if html_list[i - 1] in ['\u103B', '\u103C', '\u103D', '\u103E']:
-                    html_list[i - 1], html_list[i] = html_list[i], html_list[i - 1]
-                    if html_list[i - 2] in ['\u103B', '\u103C', '\u103D', '\u103E']:
-                        html_list[i - 2], html_list[i - 1] = html_list[i - 1], html_list[i - 2]
-                        if html_list[i - 3] in ['\u103B', '\u103C', '\u103D', '\u103E']:
-                            html_list[i - 3], html_list[i - 2] = html_list[i - 2], html_list[i - 3]
-
-        # Reorder the 'YaYit' character
-        for i, v in enumerate(html_list):
-            if v == '\u103C':
-                if html_list[i - 1] == '\u1031':
-                    html_list[i - 2], html_list[i - 1], html_list[i] = '\u001D\u1031', html_list[i], html_list[i - 2]
-                else:
-                    html_list[i - 1], html_list[i] = html_list[i], html_list[i - 1]
-
-        # Step 2: Substitute the characters
-        #########
-        # 'YaYit' character substitutions
-        for i, v in enumerate(html_list):
-            if v == '\u103C':
-                if html_list[i + 1] in ['\u1000', '\u1003', '\u100F', '\u1006', '\u1010', '\u1011',
-                                        '\u1018', '\u101A', '\u101C', '\u101E', '\u101F', '\u1021']:
-                    html_list[i] = '\uE1B2'
-
-        # One-to-One character substitutions
-        for i, v in enumerate(html_list):
-            if v == '\u1014':
-                if html_list[i + 1] in ['\u102F', '\u1030', '\u103D', '\u103E']:
-                    html_list[i] = '\uE107'
-                if html_list[i + 2] in ['\u102F', '\u1030']:
-                    html_list[i] = '\uE107'
-                if html_list[i + 1] == '\u1031':
-                    if html_list[i + 2] in ['\u102F', '\u1030', '\u103D', '\u103E']:
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\u001D\u1031', '\uE107', html_list[i + 2]
-            if v == '\u101B':
-                if html_list[i + 1] in ['\u102F', '\u1030']: html_list[i] = '\uE108'
-                if html_list[i + 2] in ['\u102F', '\u1030']: html_list[i] = '\uE108'
-                if html_list[i + 3] in ['\u102F', '\u1030']: html_list[i] = '\uE108'
-            if v == '\u102F':
-                if html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B':
-                    html_list[i] = '\uE2F1'
-                if html_list[i - 2] in ['\u103C', '\uE1B2'] or html_list[i - 3] in ['\u103C', '\uE1B2']:
-                    html_list[i] = '\uE2F1'
-                special_characters = ['\u1008', '\u1009', '\u100A', '\u100B', '\u100C', '\u100D', '\u1020', '\u1023',
-                                      '\u1025', '\u1026', '\uE009', '\uE100', '\uE101', '\uE10A', '\uE103', '\uE105']
-                if html_list[i - 1] in special_characters or html_list[i - 2] in special_characters:
-                    html_list[i] = '\uE2F1'
-            if v == '\u1030':
-                if html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B':
-                    html_list[i] = '\uE2F2'
-                if html_list[i - 2] in ['\u103C', '\uE1B2'] or html_list[i - 3] in ['\u103C', '\uE1B2']:
-                    html_list[i] = '\uE2F2'
-                special_characters = ['\u1008', '\u1009', '\u100A', '\u100B', '\u100C', '\u100D', '\u1020', '\u1023',
-                                      '\u1025', '\u1026', '\uE009', '\uE100', '\uE101', '\uE10A', '\uE103', '\uE105']
-                if html_list[i - 1] in special_characters or html_list[i - 2] in special_characters:
-                    html_list[i] = '\uE2F2'
-            if v == '\u1037':
-                if html_list[i - 1] in ['\u102F', '\u1030']:
-                    html_list[i] = '\uE037'
-                if html_list[i - 1] == '\u1014' or html_list[i - 2] == '\u1014':
-                    html_list[i] = '\uE037'
-                if html_list[i - 1] in ['\uE2F1', '\uE2F2', '\u103D']:
-                    html_list[i] = '\uE137'
-                if html_list[i - 1] == '\u103B' or html_list[i - 2] == '\u103B':
-                    html_list[i] = '\uE137'
-                if html_list[i - 1] == '\u103E' or html_list[i - 2] == '\u103E':
-                    if html_list[i - 3] == '\u101B':
-                        html_list[i] = '\uE137'
-                    else:
-                        html_list[i] = '\uE037'
-            if v == '\u103E':
-                if html_list[i - 2] in ['\u103C', '\uE1B2']:
-                    html_list[i] = '\uE1F3'
-            if v == '\u1009':
-                html_list[i] = '\uE009'
-
-        # Two-to-One character substitutions
-        for i, v in enumerate(html_list):
-            if v == '\u102D':
-                if html_list[i + 1] == '\u1036':
-                    html_list[i], html_list[i + 1] = '\uE2D1', ''
-                if html_list[i + 1] == '\u1032':
-                    html_list[i], html_list[i + 1] = '\uE12D', ''
-            if v == '\u102B':
-                if html_list[i + 1] == '\u103A':
-                    html_list[i], html_list[i + 1] = '\uE02D', ''
-                if html_list[i + 1] == '\u1032':
-                    html_list[i], html_list[i + 1] = '\uE52C', ''
-                if html_list[i + 1] == '\u1036':
-                    html_list[i], html_list[i + 1] = '\uE52B', ''
-            if v == '\u103B':
-                if html_list[i + 1] == '\u103D':
-                    html_list[i], html_list[i + 1] = '\uE1A4', ''
-                    if html_list[i + 2] == '\u103E':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1D1', '\u103B', ''
-                if html_list[i + 1] == '\u103E':
-                    html_list[i], html_list[i + 1] = '\uE1A3', ''
-            if v == '\u103D':
-                if html_list[i + 1] == '\u103E':
-                    html_list[i], html_list[i + 1] = '\uE1D1', ''
-            if v == '\u102F':
-                if html_list[i - 1] == '\u103E':
-                    html_list[i - 1], html_list[i] = '\uE1F2', ''
-                if html_list[i - 2] == '\u103E':
-                    html_list[i - 2], html_list[i] = '\uE1F2', ''
-            if v == '\u1030':
-                if html_list[i - 1] == '\u103E':
-                    html_list[i - 1], html_list[i] = '\uE430', ''
-                if html_list[i - 2] == '\u103E':
-                    html_list[i - 2], html_list[i] = '\uE430', ''
-
-        # Virama character substitutions
-        for i, v in enumerate(html_list):
-            if v == '\u1039':
-                if html_list[i - 1] == '\u103A' and html_list[i - 2] == '\u1004':
-                    html_list[i - 2], html_list[i - 1], html_list[i] = '', '', '\uE390'
-                    if html_list[i + 1] == '\u103C':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1B6', html_list[i + 2], html_list[i]
-                    elif html_list[i + 1] == '\uE1B2':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE1B7', html_list[i + 2], html_list[i]
-                    else:
-                        html_list[i], html_list[i + 1] = html_list[i + 1], html_list[i]
-                else:
-                    if html_list[i + 1] == '\u1000': html_list[i], html_list[i + 1] = '\uE000', ''
-                    if html_list[i + 1] == '\u1001': html_list[i], html_list[i + 1] = '\uE001', ''
-                    if html_list[i + 1] == '\u1002': html_list[i], html_list[i + 1] = '\uE002', ''
-                    if html_list[i + 1] == '\u1003': html_list[i], html_list[i + 1] = '\uE003', ''
-
-                    if html_list[i + 1] == '\u1005': html_list[i], html_list[i + 1] = '\uE005', ''
-                    if html_list[i + 1] == '\u1006': html_list[i], html_list[i + 1] = '\uE006', ''
-                    if html_list[i + 1] == '\u1007': html_list[i], html_list[i + 1] = '\uE007', ''
-                    if html_list[i + 1] == '\u1008': html_list[i], html_list[i + 1] = '\uE008', ''
-
-                    if html_list[i + 1] == '\u100A': html_list[i], html_list[i + 1] = '\uE00A', ''
-                    if html_list[i + 1] == '\u100B': html_list[i], html_list[i + 1] = '\uE00B', ''
-                    if html_list[i + 1] == '\u100C': html_list[i], html_list[i + 1] = '\uE00C', ''
-                    if html_list[i - 1] == '\u100F' and html_list[i + 1] == '\u100D':
-                        html_list[i - 1], html_list[i], html_list[i + 1] = '\uE105', '', ''
-                    elif html_list[i + 1] == '\u100D':
-                        html_list[i], html_list[i + 1] = '\uE00D', ''
-                    if html_list[i + 1] == '\u100E': html_list[i], html_list[i + 1] = '\uE00E', ''
-                    if html_list[i + 1] == '\u100F': html_list[i], html_list[i + 1] = '\uE00F', ''
-
-                    if html_list[i + 1] == '\u1010': html_list[i], html_list[i + 1] = '\uE010', ''
-                    if html_list[i + 1] == '\u1011': html_list[i], html_list[i + 1] = '\uE011', ''
-                    if html_list[i + 1] == '\u1012': html_list[i], html_list[i + 1] = '\uE012', ''
-                    if html_list[i + 1] == '\u1013': html_list[i], html_list[i + 1] = '\uE013', ''
-                    if html_list[i + 1] == '\u1014': html_list[i], html_list[i + 1] = '\uE014', ''
-                    if html_list[i + 1] == '\u1015': html_list[i], html_list[i + 1] = '\uE015', ''
-                    if html_list[i + 1] == '\u1016': html_list[i], html_list[i + 1] = '\uE016', ''
-                    if html_list[i + 1] == '\u1017': html_list[i], html_list[i + 1] = '\uE017', ''
-                    if html_list[i + 1] == '\u1018': html_list[i], html_list[i + 1] = '\uE018', ''
-
-                    if html_list[i + 1] == '\u1019':
-                        if html_list[i + 2] == '\u1031':
-                            html_list[i], html_list[i + 1], html_list[i + 2] = '\u1031', '\uE019', ''
-                        else:
-                            html_list[i], html_list[i + 1] = '\uE019', ''
-
-                    if html_list[i + 1] == '\u101C': html_list[i], html_list[i + 1] = '\uE01C', ''
-                    if html_list[i + 1] == '\u101E': html_list[i], html_list[i + 1] = '\uE01E', ''
-                    if html_list[i + 1] == '\u101F': html_list[i], html_list[i + 1] = '\uE553', ''
-                    if html_list[i + 1] == '\u1021': html_list[i], html_list[i + 1] = '\uE021', ''
-
-                    if html_list[i - 1] not in ['\u1000', '\u1003', '\u1006', '\u100F', '\u1010', '\u1011',
-                                                '\u1018', '\u101A', '\u101C', '\u101E', '\u101F', '\u1021']:
-                        if html_list[i] == '\uE010': html_list[i] = '\uE01F'
-                        if html_list[i] == '\uE011': html_list[i] = '\uE020'
-
-                    if html_list[i + 2] == '\u102F': html_list[i + 2] = '\uE2F1'
-                    if html_list[i + 2] == '\u1030': html_list[i + 2] = '\uE2F2'
-                    if html_list[i - 1] == '\u1014': html_list[i - 1] = '\uE107'
-
-        # 'KinZi' variant substitutions
-        for i, v in enumerate(html_list):
-            if v == '\uE390':
-                if html_list[i + 1] == '\u103B':
-                    if html_list[i + 2] == '\u102E':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE392', html_list[i + 1], ''
-                    if html_list[i + 2] == '\u102D':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE391', html_list[i + 1], ''
-                    if html_list[i + 2] == '\u1032':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE396', html_list[i + 1], ''
-                    if html_list[i + 2] == '\u1036':
-                        html_list[i], html_list[i + 1], html_list[i + 2] = '\uE393', html_list[i + 1], ''
-                else:
-                    if html_list[i + 1] == '\u102E':
-                        html_list[i], html_list[i + 1] = '\uE392', ''
-                    if html_list[i + 1] == '\u102D':
-                        html_list[i], html_list[i + 1] = '\uE391', ''
-                    if html_list[i + 1] == '\u1032':
-                        html_list[i], html_list[i + 1] = '\uE396', ''
-                    if html_list[i + 1] == '\u1036':
-                        html_list[i], html_list[i + 1] = '\uE393', ''
-
-        # 'YaYit' variant substitutions
-        for i, v in enumerate(html_list):
-            if v == '\u103C':
-                if html_list[i + 2] in ['\u102D', '\u102E', '\u1032']:
-                    html_list[i] = '\uE1B6'
-                if html_list[i + 2] == '\u103D':
-                    html_list[i] = '\uE1BB'
-                    if html_list[i + 3] in ['\u102D', '\u102E', '\u1032']:
-                        html_list[i] = '\uE1B6'
-            if v == '\uE1B2':
-                if html_list[i + 2] in ['\u102D', '\u102E', '\u1032']:
-                    html_list[i] = '\uE1B7'
-                if html_list[i + 2] == '\u103D':
-                    html_list[i] = '\uE1BC'
-                    if html_list[i + 3] in ['\u102D', '\u102E', '\u1032']:
-                        html_list[i] = '\uE1B7'
-
-        reshape_html = ''.join(map(str, html_list))
-        return reshape_html
+        # Reports without any Myanmar text are returned untouched
+        if html.isascii() or not _MYANMAR_TEXT_RE.search(html):
+            return html
+
+        # Only the Myanmar runs, widened by the context the rules look at,
+        # go through the reshaping passes. The rest of the html is kept as is.
+        reshape_html = []
+        position = 0
+        for match in _MYANMAR_TEXT_RE.finditer(html):
+            start = max(match.start() - _MYANMAR_TEXT_CONTEXT, 0)
+            end = match.end() + _MYANMAR_TEXT_CONTEXT
+            reshape_html.append(html[position:start])
+            run = html[start:end]
+            if len(run) <= _MYANMAR_TEXT_CACHED_RUN_LENGTH:
+                reshape_html.append(_myanmar_text_reshape_cached_run(run))
+            else:
+                reshape_html.append(_myanmar_text_reshape_run(run))
+            position = end
+        reshape_html.append(html[position:])
+        return ''.join(reshape_html)